@@ -1,7 +1,13 @@
 import pathlib
+from typing import Iterable, Iterator
 
 import pytest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 X = '''
 L68
@@ -38,10 +44,26 @@ def test_example2b(sequence: list[str], zeros: int) -> None:
     assert dial2(sequence) == zeros
 
 
+def test_example2d() -> None:
+    assert dial2(['R1000000000', 'L1000000050']) == 20000001
+
+
 def test_example2c() -> None:
     assert dial2(pathlib.Path('input.txt').read_text().split()) == 6689
 
 
+@pytest.mark.skipif(np is None, reason='needs numpy')
+@pytest.mark.parametrize(
+    'sequence', (
+        X.split(), ['R1000'], ['R1000', 'L50'], ['L51'], ['L50'], ['R50'],
+        ['L150', 'R250', 'L1', 'R1', 'R99', 'L100', 'R0'],
+        ['R1000000000', 'L1000000050'],
+    )
+)
+def test_batch(sequence: list[str]) -> None:
+    assert batch('\n'.join(sequence)) == (dial(sequence), dial2(sequence))
+
+
 def dialize(code: str) -> int:
     return int(code[1:]) * (-1 if code.startswith('L') else 1)
 
@@ -56,22 +78,63 @@ def dial(sequence: list[str]) -> int:
     return zc
 
 
-def dial2(sequence: list[str], p: int = 50) -> int:
+def turn(p: int, d: int) -> tuple[int, int]:
+    '''
+    >>> turn(50, 1000)
+    (50, 10)
+    >>> turn(50, -51)
+    (99, 1)
+    >>> turn(0, -5)
+    (95, 0)
+    '''
+    if d < 0:
+        zeros = ((100 - p) % 100 - d) // 100
+    else:
+        zeros = (p + d) // 100
+    return (p + d) % 100, zeros
+
+
+def dial2(sequence: Iterable[str], p: int = 50) -> int:
     zc = 0
     for d in map(dialize, sequence):
-        s = -1 if d < 0 else 1
-        while d:
-            p += s
-            d -= s
-            if p == 100:
-                p = 0
-            if p == -1:
-                p = 99
-            if p == 0:
-                zc += 1
+        p, zeros = turn(p, d)
+        zc += zeros
     return zc
 
 
+def read(path: pathlib.Path) -> Iterator[str]:
+    with path.open() as f:
+        for line in f:
+            if line := line.strip():
+                yield line
+
+
+def batch(src: str, p: int = 50) -> tuple[int, int]:
+    '''
+    dial and dial2 at once, over whole arrays; needs numpy. the rotations
+    are summed up without wrapping, so that the hundreds between two
+    positions are the zeros passed on the way
+
+    >>> batch(X) if np else (3, 6)
+    (3, 6)
+    '''
+    d = np.fromstring(
+        src.translate(str.maketrans('LR', '- ')), dtype=np.int64, sep=' '
+    )
+    pp = np.empty(len(d) + 1, dtype=np.int64)
+    pp[0] = p
+    np.cumsum(d, out=pp[1:])
+    pp[1:] += p
+    up = pp // 100
+    down = (pp - 1) // 100
+    hits = np.count_nonzero(up[1:] * 100 == pp[1:])
+    passes = np.where(d > 0, np.diff(up), -np.diff(down)).sum()
+    return int(hits), int(passes)
+
+
 if __name__ == '__main__':
-    print(dial(pathlib.Path('input.txt').read_text().split()))
-    print(dial2(pathlib.Path('input.txt').read_text().split()))
+    if np is not None:
+        print(*batch(pathlib.Path('input.txt').read_text()), sep='\n')
+    else:
+        print(dial(pathlib.Path('input.txt').read_text().split()))
+        print(dial2(read(pathlib.Path('input.txt'))))
@@ -1,5 +1,9 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import partial
+from itertools import combinations, pairwise
+from math import prod
 import pathlib
+from typing import Any, Callable, Iterator
 
 import pytest
 
@@ -55,6 +59,53 @@ def inv(n: int, strict: bool = False) -> bool:
     return False
 
 
+def prime_factors(n: int) -> list[int]:
+    '''
+    the distinct primes that divide n
+
+    >>> prime_factors(12)
+    [2, 3]
+    >>> prime_factors(7)
+    [7]
+    '''
+    return [
+        p for p in range(2, n + 1)
+        if not n % p and all(p % q for q in range(2, p))
+    ]
+
+
+def blocks(digits: int, strict: bool = False) -> Iterator[tuple[int, int]]:
+    '''
+    block lengths and repunit-style multipliers of repeated-block numbers
+    with the given number of digits
+
+    >>> list(blocks(6))
+    [(3, 1001)]
+    >>> list(blocks(6, strict=True))
+    [(3, 1001), (2, 10101), (1, 111111)]
+    '''
+    lim = digits if strict else 2
+    for x in range(2, lim+1):
+        if digits % x:
+            continue
+        k = digits // x
+        yield k, (10 ** digits - 1) // (10 ** k - 1)
+
+
+def clip(r: tuple[int, int], digits: int, k: int) -> tuple[int, int, int]:
+    '''
+    bounds of the blocks of length k whose repetitions to the given
+    number of digits lie within range r, plus the multiplier
+
+    >>> clip((95, 115), 3, 1)
+    (1, 1, 111)
+    '''
+    m = (10 ** digits - 1) // (10 ** k - 1)
+    a = max(10 ** (k - 1), -(-r[0] // m))
+    b = min(10 ** k - 1, r[1] // m)
+    return a, b, m
+
+
 def invs(
     r: tuple[int, int], strict: bool = False
 ) -> list[int]:
@@ -74,20 +125,108 @@ def invs(
     >>> invs((824824821, 824824827), strict=True)
     [824824824]
     '''
-    f = partial(inv, strict=strict)
-    return list(filter(f, range(r[0], r[1]+1)))
+    result = set()
+    for digits in range(len(f'{r[0]}'), len(f'{r[1]}')+1):
+        for k, _ in blocks(digits, strict=strict):
+            a, b, m = clip(r, digits, k)
+            result.update(range(a * m, b * m + 1, m))
+    return sorted(result)
+
+
+def invsum(r: tuple[int, int], strict: bool = False) -> int:
+    '''
+    sum of invalid IDs within range r, without enumerating them
+
+    >>> invsum((95, 115), strict=True)
+    210
+    >>> invsum((11, 22))
+    33
+    '''
+    total = 0
+    for digits in range(len(f'{r[0]}'), len(f'{r[1]}')+1):
+        ps = prime_factors(digits) if strict else [2] * (digits % 2 == 0)
+        for n in range(1, len(ps)+1):
+            for c in combinations(ps, n):
+                a, b, m = clip(r, digits, digits // prod(c))
+                if a <= b:
+                    total += (-1) ** (n+1) * m * (a + b) * (b - a + 1) // 2
+    return total
+
+
+def shard(r: tuple[int, int], parts: int) -> list[tuple[int, int]]:
+    '''
+    >>> shard((1, 10), 3)
+    [(1, 3), (4, 6), (7, 10)]
+    >>> shard((11, 12), 4)
+    [(11, 11), (12, 12)]
+    '''
+    n = r[1] - r[0] + 1
+    parts = max(1, min(parts, n))
+    bounds = [r[0] + n * i // parts for i in range(parts+1)]
+    return [(a, b - 1) for a, b in pairwise(bounds)]
+
+
+def split(
+    ranges: list[tuple[int, int]], parts: int, big: int = 10 ** 6,
+) -> list[tuple[int, int]]:
+    '''
+    shard only ranges wider than big; the work on a range grows with its
+    invalid IDs, not its width, so small ones go through whole
+
+    >>> split([(1, 10), (20, 30), (100, 160)], 3, big=20)
+    [(1, 10), (20, 30), (100, 119), (120, 139), (140, 160)]
+    '''
+    return [
+        s for r in ranges
+        for s in (shard(r, parts) if r[1] - r[0] + 1 > big else [r])
+    ]
+
+
+def fanout(
+    f: Callable[[tuple[int, int]], Any],
+    ranges: list[tuple[int, int]],
+    workers: int,
+    ordered: bool = True,
+) -> Iterator[Any]:
+    shards = split(ranges, workers)
+    with ProcessPoolExecutor(workers) as pool:
+        if ordered:
+            yield from pool.map(f, shards)
+        else:
+            futures = [pool.submit(f, s) for s in shards]
+            yield from (future.result() for future in as_completed(futures))
 
 
 def all_invalids(
     ranges: list[tuple[int, int]],
     strict: bool = False,
+    workers: int = 1,
+    ordered: bool = True,
 ) -> list[int]:
+    '''
+    >>> all_invalids(read_input(X))[:3]
+    [11, 22, 99]
+    '''
+    f = partial(invs, strict=strict)
+    if workers < 2:
+        return [i for r in ranges for i in f(r)]
     return [
-        i for r in ranges
-        for i in invs(r, strict=strict)
+        i for ii in fanout(f, ranges, workers, ordered=ordered)
+        for i in ii
     ]
 
 
+def sum_invalids(
+    ranges: list[tuple[int, int]],
+    strict: bool = False,
+    workers: int = 1,
+) -> int:
+    f = partial(invsum, strict=strict)
+    if workers < 2:
+        return sum(map(f, ranges))
+    return sum(fanout(f, ranges, workers, ordered=False))
+
+
 @pytest.mark.parametrize(
     'strict,expect', (
         (False,  1227775554),
@@ -99,8 +238,28 @@ def test_invs(strict: bool, expect: int) -> None:
     assert sum(
         all_invalids(rr, strict=strict)
     ) == expect
+    assert sum_invalids(rr, strict=strict) == expect
+
+
+@pytest.mark.parametrize('strict', (False, True))
+def test_invs_parallel(strict: bool) -> None:
+    rr = read_input(X) + [(1, 10 ** 7)]
+    serial = all_invalids(rr, strict=strict)
+    assert all_invalids(rr, strict=strict, workers=3) == serial
+    assert sorted(
+        all_invalids(rr, strict=strict, workers=3, ordered=False)
+    ) == sorted(serial)
+    assert sum_invalids(rr, strict=strict, workers=3) == sum(serial)
+
+
+@pytest.mark.parametrize('strict', (False, True))
+def test_invs_brute_force(strict: bool) -> None:
+    r = (1, 123456)
+    brute = [i for i in range(r[0], r[1]+1) if inv(i, strict=strict)]
+    assert invs(r, strict=strict) == brute
+    assert invsum(r, strict=strict) == sum(brute)
 
 
 if __name__ == '__main__':
     rr = read_input(pathlib.Path('input.txt').read_text())
-    print(sum(all_invalids(rr, strict=True)))
+    print(sum_invalids(rr, strict=True))
@@ -1,7 +1,13 @@
 import pathlib
+from typing import Iterator
 
 import pytest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 @pytest.mark.parametrize(
     'pack,jolt', (
@@ -28,29 +34,120 @@ def test_joltage_example2(pack: int, jolt: int) -> None:
 
 
 def joltage(pack: int | str, figs: int = 2) -> int:
-    digits = []
-    i = 0
-    while figs > 0:
-        figs -= 1
-        n, j = maxat(
-            f'{pack}'[i:-figs] if figs else f'{pack}'[i:]
-        )
-        digits.append(n)
-        i += j
-    return sum(n * 10 ** i for i, n in enumerate(reversed(digits)))
-
-
-def maxat(s: str) -> tuple[int, int]:
-    m, j = 0, 0
-    for i, c in enumerate(s):
-        if (n := int(c)) > m:
-            m, j = n, i + 1
-        if n == 9:
-            break
-    return m, j
+    return pick(f'{pack}'.encode(), figs)
+
+
+def pick(bank: bytes, figs: int = 2) -> int:
+    '''
+    >>> pick(b'818181911112111')
+    92
+    >>> pick(b'9' * 2000 + b'1' * 3000, 500) == int('9' * 500)
+    True
+    >>> pick(b'12345', 5), pick(b'54321', 1), pick(b'19191', 3)
+    (12345, 5, 991)
+    '''
+    return picks(bank, figs)[0]
+
+
+def picks(bank: bytes, *figs: int) -> tuple[int, ...]:
+    '''
+    >>> picks(b'234234234234278', 2, 12)
+    (78, 434234234278)
+
+    >>> picks(b'321', 0, 3)
+    (0, 321)
+
+    >>> picks(b'321', 4)
+    Traceback (most recent call last):
+    ...
+    ValueError: cannot pick 4 digits from a bank of 3
+    '''
+    for f in figs:
+        if not 0 <= f <= len(bank):
+            raise ValueError(
+                f'cannot pick {f} digits from a bank of {len(bank)}'
+            )
+    drops = [len(bank) - f for f in figs]
+    stacks = [bytearray() for _ in figs]
+    for c in bank:
+        for i, stack in enumerate(stacks):
+            while drops[i] and stack and stack[-1] < c:
+                stack.pop()
+                drops[i] -= 1
+            stack.append(c)
+    return tuple(
+        int(stack[:f]) if f else 0 for stack, f in zip(stacks, figs)
+    )
+
+
+def joltages(src: bytes, figs: int = 2) -> Iterator[int]:
+    '''
+    >>> list(joltages(b'987654321111111\\n811111111111119\\n'))
+    [98, 89]
+    '''
+    return (pick(bank, figs) for bank in src.split())
+
+
+def batch(banks: list[bytes], *figs: int) -> tuple[int, ...]:
+    '''
+    totals over banks of equal length, as rows of a digit matrix that all
+    pick their next digit at once: the leftmost highest one between the
+    last pick and the last column that leaves room for the rest. needs
+    numpy
+
+    >>> batch([b'818181911112111', b'234234234234278'], 2, 12) if np else (
+    ...     170, 1323145346389
+    ... )
+    (170, 1323145346389)
+    '''
+    digits = np.frombuffer(b''.join(banks), dtype=np.uint8).reshape(
+        len(banks), -1
+    )
+    n, width = digits.shape
+    cols = np.arange(width)
+    result = []
+    for f in figs:
+        if not 0 <= f <= width:
+            raise ValueError(f'cannot pick {f} digits from a bank of {width}')
+        last = np.full((n, 1), -1)
+        total = 0
+        for t in range(f):
+            window = (cols > last) & (cols <= width - f + t)
+            last = np.where(window, digits, 0).argmax(axis=1)[:, None]
+            picked = np.take_along_axis(digits, last, axis=1)
+            total = 10 * total + int(picked.sum()) - n * ord('0')
+        result.append(total)
+    return tuple(result)
+
+
+@pytest.mark.skipif(np is None, reason='needs numpy')
+@pytest.mark.parametrize('banks', (
+    [b'987654321111111', b'811111111111119', b'234234234234278'],
+    [b'818181911112111'],
+    [b'12345', b'54321', b'19191', b'99999', b'00000'],
+))
+def test_batch(banks: list[bytes]) -> None:
+    figs = range(len(banks[0]) + 1)
+    assert batch(banks, *figs) == tuple(
+        map(sum, zip(*(picks(bank, *figs) for bank in banks)))
+    )
+
+
+def totals(src: bytes, *figs: int) -> tuple[int, ...]:
+    '''
+    >>> totals(b'987654321111111 811111111111119', 2, 12)
+    (187, 1798765432230)
+    '''
+    banks = src.split()
+    if np is not None and banks and len(set(map(len, banks))) == 1:
+        return batch(banks, *figs)
+    result = [0] * len(figs)
+    for bank in banks:
+        for i, jolt in enumerate(picks(bank, *figs)):
+            result[i] += jolt
+    return tuple(result)
 
 
 if __name__ == '__main__':
-    banks = pathlib.Path('input.txt').read_text().split()
-    print(sum(joltage(bank) for bank in banks))
-    print(sum(joltage(bank, 12) for bank in banks))
+    banks = pathlib.Path('input.txt').read_bytes()
+    print(*totals(banks, 2, 12), sep='\n')
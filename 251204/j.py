@@ -1,6 +1,13 @@
 from __future__ import annotations
 import pathlib
 
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 X = '''\
 ..@@.@@@@.
@@ -56,7 +63,7 @@ class Grid:
     3
     '''
     def __init__(self, rows: list[str]):
-        self.data = ''.join(rows)
+        self.data = bytearray(''.join(rows), 'ascii')
         self.width = max(map(len, rows))
         self.height = len(rows)
 
@@ -64,14 +71,14 @@ class Grid:
         if pos not in self:
             return ''
         x, y = pos
-        return self.data[x+y*self.width]
+        return chr(self.data[x+y*self.width])
 
     def __setitem__(self, pos: tuple[int, int], s: str) -> None:
         if pos not in self:
             return
         x, y = pos
         i = x+y*self.width
-        self.data = self.data[:i] + s[:1] + self.data[i+1:]
+        self.data[i:i+1] = s[:1].encode('ascii')
 
     def __contains__(self, pos: tuple[int, int]) -> bool:
         x, y = pos
@@ -92,28 +99,75 @@ class Grid:
                     return count
         return count
 
+    def neighbour_counts(self) -> list[list[int]]:
+        '''
+        >>> Grid(['@@.', '.@.', '...']).neighbour_counts()
+        [[2, 2, 2], [3, 2, 2], [1, 1, 1]]
+        '''
+        w = self.width
+        rows = [
+            [0] + [int(c == ord('@')) for c in self.data[y*w:(y+1)*w]] + [0]
+            for y in range(self.height)
+        ]
+        hsums = [[0] * w] + [
+            list(map(sum, zip(row, row[1:], row[2:]))) for row in rows
+        ] + [[0] * w]
+        return [
+            [
+                n - c for n, c in zip(
+                    map(sum, zip(*hsums[y:y+3])), rows[y][1:]
+                )
+            ]
+            for y in range(self.height)
+        ]
+
+    def neighbour_array(self) -> np.ndarray:
+        '''
+        neighbour_counts as a uint8 array, summed from shifted slices of the
+        padded floor plan; needs numpy
+
+        >>> g = Grid(['@@.', '.@.', '...'])
+        >>> g.neighbour_array().tolist() if np else g.neighbour_counts()
+        [[2, 2, 2], [3, 2, 2], [1, 1, 1]]
+        '''
+        w, h = self.width, self.height
+        padded = np.zeros((h+2, w+2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = np.frombuffer(
+            self.data, dtype=np.uint8
+        ).reshape(h, w) == ord('@')
+        counts = np.zeros((h, w), dtype=np.uint8)
+        for dy in range(3):
+            for dx in range(3):
+                counts += padded[dy:dy+h, dx:dx+w]
+        counts -= padded[1:-1, 1:-1]
+        return counts
+
     def find_accessibles(self) -> list[tuple[int, int]]:
-        result = []
-        for y in range(self.height):
-            for x in range(self.width):
-                if self[x, y] != '@':
-                    continue
-                if self.adjacent_rolls((x, y)) < 4:
-                    result.append((x, y))
-        return result
+        if np is not None:
+            rolls = np.frombuffer(self.data, dtype=np.uint8).reshape(
+                self.height, self.width
+            ) == ord('@')
+            ys, xs = np.nonzero((self.neighbour_array() < 4) & rolls)
+            return list(zip(xs.tolist(), ys.tolist()))
+        return [
+            (x, y)
+            for y, row in enumerate(self.neighbour_counts())
+            for x, n in enumerate(row)
+            if n < 4 and self[x, y] == '@'
+        ]
 
     def remove(self, xx: list[tuple[int, int]]) -> Grid:
         result: Grid = self.__class__.__new__(self.__class__)
         result.width = self.width
         result.height = self.height
-        result.data = self.data
+        result.data = self.data.copy()
         for x in xx:
             result[x] = 'x'
         return result
 
     def __str__(self) -> str:
         rows = [
-            self.data[y*self.width:(y+1)*self.width]
+            self.data[y*self.width:(y+1)*self.width].decode('ascii')
             for y in range(self.height)
         ]
         return '\n'.join(rows)
@@ -124,6 +178,15 @@ def test_io() -> None:
     assert f'{g}' == X
 
 
+@pytest.mark.skipif(np is None, reason='needs numpy')
+@pytest.mark.parametrize(
+    'rows', (X.split(), D.split(), ['@'], ['@@@', '@@@', '@@@'], ['.@', '@.']),
+)
+def test_neighbour_array(rows: list[str]) -> None:
+    g = Grid(rows)
+    assert g.neighbour_array().tolist() == g.neighbour_counts()
+
+
 def test_part1() -> None:
     g = load(X)
     assert len(g.find_accessibles()) == 13
@@ -133,6 +196,7 @@ def test_rm() -> None:
     g = load(X)
     c = g.remove(g.find_accessibles())
     assert f'{c}' == S
+    assert f'{g}' == X
 
 
 def work(g: Grid) -> tuple[Grid, int]:
@@ -168,7 +232,48 @@ def workywork(g: Grid) -> list[int]:
     return steps
 
 
+def peel(g: Grid) -> list[int]:
+    '''
+    >>> peel(load(X))
+    [13, 12, 7, 5, 2, 1, 1, 1, 1]
+
+    >>> peel(load(D))
+    []
+
+    >>> peel(Grid(['@@@', '@@@', '@@@'])), workywork(Grid(['@@@'] * 3))
+    ([4, 4, 1], [4, 4, 1])
+    '''
+    w, h = g.dimensions
+
+    def around(i: int) -> list[int]:
+        x, y = i % w, i // w
+        return [
+            xv + yv * w
+            for yv in range(max(0, y-1), min(h, y+2))
+            for xv in range(max(0, x-1), min(w, x+2))
+            if xv != x or yv != y
+        ]
+
+    rolls = {i for i, c in enumerate(g.data) if c == ord('@')}
+    counts = {i: sum(j in rolls for j in around(i)) for i in rolls}
+    queue = [i for i in rolls if counts[i] < 4]
+    steps = []
+    while queue:
+        steps.append(len(queue))
+        rolls.difference_update(queue)
+        peeled = []
+        for i in queue:
+            for j in around(i):
+                if j not in rolls:
+                    continue
+                counts[j] -= 1
+                if counts[j] == 3:
+                    peeled.append(j)
+        queue = peeled
+    return steps
+
+
 if __name__ == '__main__':
     g = load(pathlib.Path('input.txt').read_text())
     print(len(g.find_accessibles()))
-    print(sum(workywork(g)))
+    print(sum(peel(g)))
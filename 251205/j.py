@@ -1,4 +1,8 @@
+from bisect import bisect_right
+from io import StringIO
+from itertools import chain, islice
 import pathlib
+from typing import Iterable, Iterator
 
 import pytest
 
@@ -56,7 +60,8 @@ def count_fresh(ingredients: list[int], ranges: list[tuple[int, int]]) -> int:
     >>> count_fresh(ii, rr)
     3
     '''
-    return sum(isfresh(i, ranges) for i in ingredients)
+    index = RangeIndex(ranges)
+    return sum(i in index for i in ingredients)
 
 
 def overlap(r1: tuple[int, int], r2: tuple[int, int]) -> bool:
@@ -111,7 +116,102 @@ def size(ranges: list[tuple[int, int]]) -> int:
     return sum(1 + b - a for a, b in merge(ranges))
 
 
+class RangeIndex:
+    '''
+    >>> rr, ii = load(X)
+    >>> index = RangeIndex(rr)
+    >>> index.starts, index.ends
+    ([3, 10], [5, 20])
+    >>> 5 in index, 8 in index
+    (True, False)
+    >>> index.fresh(sorted(ii))
+    [False, True, False, True, True, False]
+
+    >>> index = RangeIndex([(7, 9), (1, 3), (4, 4)])
+    >>> index.starts, index.ends
+    ([1, 7], [4, 9])
+    >>> [i in index for i in (0, 1, 4, 5, 9, 10)]
+    [False, True, True, False, True, False]
+    >>> index.fresh([0, 1, 4, 5, 9, 10])
+    [False, True, True, False, True, False]
+
+    >>> 1 in RangeIndex([]), RangeIndex([]).fresh([1])
+    (False, [False])
+
+    >>> RangeIndex(rr).size(), RangeIndex([]).size()
+    (14, 0)
+    '''
+    def __init__(self, ranges: list[tuple[int, int]]):
+        merged = merge(ranges) if ranges else []
+        self.starts = [a for a, _ in merged]
+        self.ends = [b for _, b in merged]
+
+    def __contains__(self, ingredient: int) -> bool:
+        i = bisect_right(self.starts, ingredient) - 1
+        return i >= 0 and ingredient <= self.ends[i]
+
+    def fresh(self, ingredients: list[int]) -> list[bool]:
+        result = []
+        i, n = 0, len(self.ends)
+        for ingredient in ingredients:
+            while i < n and self.ends[i] < ingredient:
+                i += 1
+            result.append(i < n and self.starts[i] <= ingredient)
+        return result
+
+    def size(self) -> int:
+        return sum(1 + b - a for a, b in zip(self.starts, self.ends))
+
+
+def read_ranges(lines: Iterable[str]) -> tuple[RangeIndex, Iterator[str]]:
+    '''
+    index the ranges at the top, and hand back the lines after them
+
+    >>> index, rest = read_ranges(StringIO(X))
+    >>> index.ends, next(rest)
+    ([5, 20], '\\n')
+    '''
+    lines = iter(lines)
+    ranges = []
+    for line in lines:
+        if '-' not in line:
+            lines = chain([line], lines)
+            break
+        a, b = map(int, line.split('-'))
+        ranges.append((a, b))
+    return RangeIndex(ranges), lines
+
+
+def stream(
+    lines: Iterable[str], chunksize: int = 1 << 16,
+    index: RangeIndex | None = None,
+) -> Iterator[bool]:
+    '''
+    answer for each ingredient ID in turn; without an index, the ranges
+    are read off the top of the lines first
+
+    >>> list(stream(StringIO(X), chunksize=4))
+    [False, True, False, True, True, False]
+
+    >>> list(stream(StringIO('1-3\\n\\n9\\n2\\n\\n3\\n0'), chunksize=2))
+    [False, True, True, False]
+
+    >>> list(stream(['4', '9'], index=RangeIndex([(3, 5)])))
+    [True, False]
+    '''
+    if index is None:
+        index, lines = read_ranges(lines)
+    iids = (int(line) for line in lines if line.strip())
+    while chunk := list(islice(iids, chunksize)):
+        order = sorted(range(len(chunk)), key=chunk.__getitem__)
+        answers = [False] * len(chunk)
+        for i, fresh in zip(order, index.fresh([chunk[i] for i in order])):
+            answers[i] = fresh
+        yield from answers
+
+
 if __name__ == '__main__':
-    rr, ii = load(pathlib.Path('input.txt').read_text())
-    print(count_fresh(ii, rr))
-    print(size(rr))
+    with pathlib.Path('input.txt').open() as f:
+        index, iids = read_ranges(f)
+        print(sum(stream(iids, index=index)))
+    print(index.size())
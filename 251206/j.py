@@ -1,6 +1,12 @@
 from collections import defaultdict
+import itertools
+import math
+import mmap
 import pathlib
 import re
+from typing import Iterable, Iterator
+
+import pytest
 
 
 X = '''\
@@ -73,13 +79,10 @@ def solve(prob: Problem) -> int:
     [8544, 625, 3253600, 1058]
     '''
     op, *rands = prob
-    assert isinstance(
-        result := eval(op.join(map(str, rands))), int
-    )
-    return result
+    return sum(rands) if op == '+' else math.prod(rands)
 
 
-def solve_all(probs: list[Problem]) -> int:
+def solve_all(probs: Iterable[Problem]) -> int:
     '''
     >>> solve_all(load(X))
     4277556
@@ -90,9 +93,108 @@ def solve_all(probs: list[Problem]) -> int:
     return sum(map(solve, probs))
 
 
+def transpose(src: str) -> list[str]:
+    '''
+    >>> transpose('12\\n 3\\n+ ')
+    ['1 +', '23 ']
+    '''
+    rows = [row for row in src.split('\n') if row]
+    width = max(map(len, rows))
+    return [
+        ''.join(col) for col in zip(*(row.ljust(width) for row in rows))
+    ]
+
+
+def columnar(src: str, cephmode: bool = False) -> Iterator[Problem]:
+    '''
+    >>> list(columnar(X)) == load(X)
+    True
+
+    >>> list(columnar(X, cephmode=True)) == load(X, cephmode=True)
+    True
+    '''
+    return problems(transpose(src), cephmode=cephmode)
+
+
+def problems(
+    columns: Iterable[str], cephmode: bool = False
+) -> Iterator[Problem]:
+    group: list[str] = []
+    for col in itertools.chain(columns, ['']):
+        digits = ''.join(filter(str.isdigit, col[:-1]))
+        if digits or col[-1:] in ('+', '*'):
+            group.append(col)
+            continue
+        if not group:
+            continue
+        if cephmode:
+            operands = [
+                int(n)
+                for c in reversed(group)
+                if (n := ''.join(filter(str.isdigit, c[:-1])))
+            ]
+        else:
+            operands = [
+                int(''.join(c[i] for c in group if c[i].isdigit()))
+                for i in range(len(group[0]) - 1)
+            ]
+        op = next(c[-1] for c in group if c[-1] in ('+', '*'))
+        yield (op, *operands)
+        group = []
+
+
+def scan(
+    path: pathlib.Path, cephmode: bool = False, window: int = 1 << 16,
+) -> Iterator[Problem]:
+    '''
+    memory-map the worksheet and read its columns in windows of fixed width
+    '''
+    if not path.stat().st_size:
+        return
+    with (
+        path.open('rb') as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        rows = []
+        start = 0
+        while start < len(mm):
+            if (end := mm.find(b'\n', start)) < 0:
+                end = len(mm)
+            if end > start:
+                rows.append((start, end))
+            start = end + 1
+        if not rows:
+            return
+        width = max(end - start for start, end in rows)
+
+        def columns() -> Iterator[str]:
+            for i in range(0, width, window):
+                w = min(window, width - i)
+                cells = [
+                    mm[start+i:min(end, start+i+w)].decode().ljust(w)
+                    for start, end in rows
+                ]
+                yield from map(''.join, zip(*cells))
+
+        yield from problems(columns(), cephmode=cephmode)
+
+
+@pytest.mark.parametrize('cephmode', (False, True))
+@pytest.mark.parametrize('window', (1, 3, 100))
+def test_scan(
+    tmp_path: pathlib.Path, cephmode: bool, window: int
+) -> None:
+    (path := tmp_path / 'input.txt').write_text(X)
+    probs = list(scan(path, cephmode=cephmode, window=window))
+    assert probs == load(X, cephmode=cephmode)
+
+
+@pytest.mark.parametrize('src', ('', '\n\n', '   \n  \n'))
+def test_scan_blank(tmp_path: pathlib.Path, src: str) -> None:
+    (path := tmp_path / 'input.txt').write_text(src)
+    assert list(scan(path)) == []
+
+
 if __name__ == '__main__':
-    probs = load(
-        pathlib.Path('input.txt').read_text(),
-        cephmode=True,
-    )
+    probs = scan(pathlib.Path('input.txt'), cephmode=True)
     print(solve_all(probs))
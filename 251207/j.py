@@ -1,3 +1,4 @@
+from collections import defaultdict
 from pathlib import Path
 
 
@@ -46,23 +47,74 @@ def trace(manifold: list[str]) -> tuple[list[str], int]:
     >>> splits
     21
 
+    '''
+    splits, _, result = beams(manifold, render=True)
+    return result, splits
+
+
+def beams(
+    manifold: list[str], render: bool = False,
+) -> tuple[int, int, list[str]]:
+    '''
+    count splits and timelines, rendering the beams only if asked to
+
+    >>> beams(X.split('\\n'))
+    (21, 40, [])
     '''
     splits = 0
-    above = manifold[0]
-    result = [above]
+    counts = [int(c == 'S') for c in manifold[0]]
+    result = [manifold[0]] if render else []
     for line in manifold[1:]:
-        cells = ['.'] * len(line)
-        for i, c in enumerate(line):
-            if above[i] in ('|', 'S'):
-                if c == '.':
-                    cells[i] = '|'
-                elif c == '^':
-                    cells[i-1:i+2] = ['|', '^', '|']
-                    splits += 1
-            elif c == '^':
-                cells[i] = c
-        result.append(above := ''.join(cells))
-    return result, splits
+        below = [0] * len(line)
+        for i, (c, n) in enumerate(zip(line, counts)):
+            if not n:
+                continue
+            if c == '^':
+                splits += 1
+                if i > 0:
+                    below[i-1] += n
+                if i + 1 < len(below):
+                    below[i+1] += n
+            else:
+                below[i] += n
+        counts = below
+        if render:
+            result.append(''.join(
+                c if c == '^' else '|' if n else '.'
+                for c, n in zip(line, counts)
+            ))
+    return splits, sum(counts), result
+
+
+def sweep(manifold: list[str]) -> tuple[int, int]:
+    '''
+    like beams, but only visit the columns that currently carry a beam
+
+    >>> sweep(X.split('\\n'))
+    (21, 40)
+
+    >>> sweep(['.S.', '...', '.^.', '^.^'])
+    (3, 2)
+    >>> beams(['.S.', '...', '.^.', '^.^'])
+    (3, 2, [])
+    '''
+    splits = 0
+    counts = {manifold[0].index('S'): 1}
+    for line in manifold[1:]:
+        if '^' not in line:
+            continue
+        below: dict[int, int] = defaultdict(int)
+        for i, n in counts.items():
+            if line[i] != '^':
+                below[i] += n
+                continue
+            splits += 1
+            if i > 0:
+                below[i-1] += n
+            if i + 1 < len(line):
+                below[i+1] += n
+        counts = below
+    return splits, sum(counts.values())
 
 
 def test_tracing() -> None:
@@ -72,5 +124,6 @@ def test_tracing() -> None:
 
 
 if __name__ == '__main__':
-    manifold, splits = trace(Path('input.txt').read_text().split())
+    splits, timelines = sweep(Path('input.txt').read_text().split())
     print(splits)
+    print(timelines)
@@ -1,6 +1,17 @@
+import bisect
+from collections import defaultdict
 from functools import reduce
+import heapq
 import itertools
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 X = '''
@@ -70,8 +81,172 @@ def closest_pairs(points: list[Point]) -> list[tuple[Point, Point]]:
     )
 
 
+def nearest_pairs(points: list[Point]) -> Iterator[tuple[Point, Point]]:
+    '''
+    >>> cp = nearest_pairs(load(X))
+    >>> list(itertools.islice(cp, 4)) == closest_pairs(load(X))[:4]
+    True
+    '''
+    return (
+        (points[i], points[j]) for i, j in nearest_indices(points)
+    )
+
+
+def nearest_indices(points: list[Point]) -> Iterator[tuple[int, int]]:
+    '''
+    yield index pairs in the same order as closest_pairs, but lazily: the
+    points go into a k-d tree, and pairs of its nodes are opened closest
+    bounding boxes first, only as far out as the pairs yielded so far reach
+
+    >>> list(itertools.islice(nearest_indices(load(X)), 2))
+    [(0, 19), (0, 7)]
+    '''
+    if len(points) < 2:
+        return
+    order = list(range(len(points)))
+    # lowest corner, highest corner, slice of order, child nodes
+    nodes: list[tuple[Point, Point, int, int, tuple[int, ...]]] = []
+
+    def build(start: int, end: int) -> int:
+        chunk = [points[i] for i in order[start:end]]
+        lo, hi = tuple(map(min, zip(*chunk))), tuple(map(max, zip(*chunk)))
+        node = len(nodes)
+        nodes.append((lo, hi, start, end, ()))  # type: ignore
+        if end - start > 8:
+            axis = max(range(3), key=lambda a: hi[a] - lo[a])
+            order[start:end] = sorted(
+                order[start:end], key=lambda i: points[i][axis]
+            )
+            mid = (start + end) // 2
+            nodes[node] = (
+                lo, hi, start, end, (build(start, mid), build(mid, end))
+            )  # type: ignore
+        return node
+
+    def gap(a: int, b: int) -> int:
+        (alo, ahi, *_), (blo, bhi, *_) = nodes[a], nodes[b]
+        return sum(
+            max(0, l2 - h1, l1 - h2) ** 2
+            for l1, h1, l2, h2 in zip(alo, ahi, blo, bhi)
+        )
+
+    # once every node pair within the limit is opened, the pairs found
+    # within the limit are all there are, and go out sorted; the limit
+    # doubles each round, or jumps to the next node pair or pair found
+    root = build(0, len(points))
+    heap: list[tuple[int, int, int]] = [(0, root, root)]
+    found: list[tuple[int, int, int]] = []
+    limit = 0
+
+    def push(pairs: Iterable[tuple[int, int]]) -> None:
+        found.extend(
+            ((u - x) ** 2 + (v - y) ** 2 + (w - z) ** 2, min(i, j), max(i, j))
+            for i, j in pairs
+            for (x, y, z), (u, v, w) in ((points[i], points[j]),)
+        )
+
+    while heap or found:
+        while heap and heap[0][0] <= limit:
+            _, a, b = heapq.heappop(heap)
+            *_, sa, ea, ka = nodes[a]
+            *_, sb, eb, kb = nodes[b]
+            if a == b and ka:
+                left, right = ka
+                for c, d in ((left, left), (right, right), (left, right)):
+                    heapq.heappush(heap, (gap(c, d), c, d))
+            elif a == b:
+                push(itertools.combinations(order[sa:ea], 2))
+            elif not ka and not kb:
+                push(itertools.product(order[sa:ea], order[sb:eb]))
+            elif ka and (not kb or ea - sa >= eb - sb):
+                for c in ka:
+                    heapq.heappush(heap, (gap(c, b), c, b))
+            else:
+                for c in kb:
+                    heapq.heappush(heap, (gap(a, c), a, c))
+        found.sort()
+        done = bisect.bisect(found, (limit, len(points), 0))
+        for _, i, j in found[:done]:
+            yield i, j
+        del found[:done]
+        if heap or found:
+            limit = max(2 * limit, 1, heap[0][0] if heap else found[-1][0])
+
+
+@pytest.mark.parametrize('points', (
+    [(0, 0, 0), (3, 4, 0)],
+    [(5, 5, 5), (0, 0, 0), (5, 5, 5)],
+    load(X),
+    load(X) + [(10 ** 9, 0, 0)],
+    [
+        (3, 1, 0), (0, 4, 2), (7, 7, 7), (2, 2, 9), (5, 0, 3),
+        (100003, 1, 0), (100000, 4, 2), (100007, 7, 7), (100002, 2, 9),
+    ],
+    [(x, y, 0) for x in range(4) for y in range(4)] + [(1, 1, 0), (2, 3, 0)],
+))
+def test_nearest_pairs(points: list[Point]) -> None:
+    assert list(nearest_pairs(points)) == closest_pairs(points)
+    if np is not None:
+        assert [
+            (points[i], points[j]) for i, j in shortest(points, 20)
+        ] == closest_pairs(points)[:20]
+
+
+def shortest(
+    points: list[Point], k: int, block: int = 1 << 22,
+) -> list[tuple[int, int]]:
+    '''
+    the k closest index pairs, from squared distances worked out a block
+    of rows at a time against the points after them; a block only hands on
+    pairs within the k-th best distance so far, which argpartition finds,
+    and ties are kept until a final sort settles them as closest_pairs
+    does. needs numpy
+
+    >>> if np:
+    ...     assert shortest(load(X), 4) == list(
+    ...         itertools.islice(nearest_indices(load(X)), 4)
+    ...     )
+    ...     assert shortest(load(X), 0) == []
+    ...     assert shortest([(0, 0, 0), (1, 0, 0), (0, 1, 0)], 5) == [
+    ...         (0, 1), (0, 2), (1, 2)
+    ...     ]
+    '''
+    n = len(points)
+    k = min(k, n * (n - 1) // 2)
+    if k <= 0:
+        return []
+    pp = np.array(points, dtype=np.int64).reshape(n, 3)
+    far = np.iinfo(np.int64).max
+    dd = ii = jj = np.empty(0, dtype=np.int64)
+    top = far
+    rows = max(1, block // n)
+    for start in range(0, n - 1, rows):
+        end = min(start + rows, n - 1)
+        d = pp[start:end, None, 0] - pp[None, start:, 0]
+        d *= d
+        for a in (1, 2):
+            e = pp[start:end, None, a] - pp[None, start:, a]
+            e *= e
+            d += e
+        # only pairs i < j, with j counted from start
+        d[:, :end - start][np.tri(end - start, dtype=bool)] = far
+        pick = np.flatnonzero(d <= top) if top < far else np.flatnonzero(
+            d < far
+        )
+        i, j = np.divmod(pick, n - start)
+        dd = np.concatenate((dd, d.ravel()[pick]))
+        ii = np.concatenate((ii, i + start))
+        jj = np.concatenate((jj, j + start))
+        if len(dd) > k:
+            top = dd[np.argpartition(dd, k - 1)[k - 1]]
+            keep = dd <= top
+            dd, ii, jj = dd[keep], ii[keep], jj[keep]
+    best = np.lexsort((jj, ii, dd))[:k]
+    return list(zip(ii[best].tolist(), jj[best].tolist()))
+
+
 def connect(
-    points: list[Point], steps: int = -1,
+    points: list[Point], steps: int = -1, blocked: bool = False,
 ) -> list[set[Point]]:
     '''
     >>> cc = connect(load(X), steps=2)
@@ -93,25 +268,92 @@ def connect(
     11
     >>> [len(c) for c in cc]
     [5, 4, 2, 2, 1, 1, 1, 1, 1, 1, 1]
+
+    blocked, a fixed number of steps is served by shortest if numpy is
+    around
+
+    >>> [len(c) for c in connect(load(X), steps=10, blocked=True)][:4]
+    [5, 4, 2, 2]
     '''
-    circuits = {p: {p} for p in points}
-    cp = closest_pairs(points)
-    for i, (a, b) in enumerate(cp):
-        if i == steps:
-            break
-        a, b = sorted((a, b), key=lambda p: len(circuits[p]))
-        circuits[b] |= circuits[a]
-        for p in circuits[a]:
-            circuits[p] = circuits[b]
-    return sorted(
-        set(frozenset(v) for v in circuits.values()),  # type: ignore
-        key=len, reverse=True,
-    )
+    circuits = Circuits(len(points))
+    if blocked and steps >= 0 and np is not None:
+        pairs: Iterable[tuple[int, int]] = shortest(points, steps)
+    else:
+        pairs = itertools.islice(
+            nearest_indices(points), steps if steps >= 0 else None
+        )
+    for i, j in pairs:
+        circuits.union(i, j)
+    groups = defaultdict(set)
+    for i, p in enumerate(points):
+        groups[circuits.find(i)].add(p)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+class Circuits:
+    '''
+    union-find over point indices, with path compression and union by size
+
+    >>> cc = Circuits(5)
+    >>> cc.union(0, 1), cc.union(3, 1), cc.union(0, 3)
+    (True, True, False)
+    >>> cc.largest(2), cc.count
+    ([3, 1], 3)
+    '''
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.count = n
+
+    def find(self, i: int) -> int:
+        root = i
+        while (up := self.parent[root]) != root:
+            root = up
+        while (up := self.parent[i]) != root:
+            self.parent[i] = root
+            i = up
+        return root
+
+    def union(self, i: int, j: int) -> bool:
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return False
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        self.count -= 1
+        return True
+
+    def largest(self, n: int = 3) -> list[int]:
+        return heapq.nlargest(n, (
+            size for i, size in enumerate(self.size)
+            if self.parent[i] == i
+        ))
+
+
+def unify(points: list[Point]) -> tuple[int, Point, Point]:
+    '''
+    the number of connections after which all boxes form one circuit, and
+    the last pair connected
+
+    >>> unify(load(X))
+    (29, (216, 146, 977), (117, 168, 530))
+    '''
+    circuits = Circuits(len(points))
+    for step, (i, j) in enumerate(nearest_indices(points), 1):
+        if circuits.union(i, j) and circuits.count == 1:
+            return step, points[i], points[j]
+    raise ValueError('points do not form a single circuit')
 
 
 def test_3_largest_circuits() -> None:
     cc = connect(load(X), steps=10)
     assert reduce(int.__mul__, map(len, cc[:3])) == 40
+    circuits = Circuits(len(points := load(X)))
+    for i, j in itertools.islice(nearest_indices(points), 10):
+        circuits.union(i, j)
+    assert circuits.largest() == [5, 4, 2]
 
 
 if __name__ == '__main__':
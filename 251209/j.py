@@ -1,6 +1,9 @@
+from collections import deque
 from functools import reduce
-from itertools import combinations, dropwhile, product
+import heapq
+from itertools import accumulate, combinations, pairwise, product
 from pathlib import Path
+from typing import Iterable, Iterator
 
 X = '''
 7,1
@@ -64,10 +67,85 @@ def bigrect(points: list[Point]) -> tuple[int, Point, Point]:
     '''
     >>> bigrect(load(X))[0]
     50
+    >>> bigrect([(0, 0), (5, 0), (2, 0)])
+    (6, (0, 0), (5, 0))
+    >>> bigrect([(1, 1), (9, 9), (0, 10), (10, 0)])
+    (121, (10, 0), (0, 10))
     '''
-    pairs = sorted(combinations(points, 2), key=lambda p: area(*p))
-    a, b = pairs[-1]
-    return area(a, b), a, b
+    best = (0, points[0], points[0])
+    for sx, sy in ((1, 1), (1, -1)):
+        ends = corners(points, sx, sy)
+        xr = [min(x for x, _ in ends), max(x for x, _ in ends)]
+        yr = [min(y for _, y in ends), max(y for _, y in ends)]
+        starts = sorted((
+            (max(abs(a[0] - x) for x in xr) + 1)
+            * (max(abs(a[1] - y) for y in yr) + 1), a
+        ) for a in corners(points, -sx, -sy))
+        for bound, a in reversed(starts):
+            if bound <= best[0]:
+                break
+            for b in ends:
+                if (ab := area(a, b)) > best[0]:
+                    best = (ab, a, b)
+    return best
+
+
+def corners(points: list[Point], sx: int, sy: int) -> list[Point]:
+    '''
+    the points not dominated by any other point in direction (sx, sy),
+    i.e. the only candidates for that corner of a biggest rectangle
+
+    >>> corners(load(X), 1, 1)
+    [(11, 7)]
+    >>> corners(load(X), -1, 1)
+    [(2, 5), (9, 7)]
+    '''
+    result: list[Point] = []
+    for p in sorted(
+        points, key=lambda p: (sx * p[0], sy * p[1]), reverse=True
+    ):
+        if not result or sy * p[1] > sy * result[-1][1]:
+            result.append(p)
+    return result
+
+
+def descending(
+    points: list[Point], chunk: int = 16,
+) -> Iterator[tuple[int, Point, Point]]:
+    '''
+    pairs by decreasing area, ties in combinations order; every point
+    keeps only its next few partners at hand and rescans for more once
+    they are used up
+
+    >>> [a for a, _, _ in descending(load(X))][:4]
+    [50, 50, 40, 35]
+    '''
+    def partners(i: int, after: tuple[int, int]) -> list[tuple[int, int]]:
+        x, y = points[i]
+        keys = (
+            (-(abs(x - u) + 1) * (abs(y - v) + 1), j)
+            for j in range(i + 1, len(points))
+            for u, v in [points[j]]
+        )
+        result = heapq.nsmallest(chunk, (k for k in keys if k > after))
+        result.reverse()
+        return result
+
+    pending = {i: partners(i, (-1 << 128, -1)) for i in range(len(points))}
+    heap = []
+    for i, ii in pending.items():
+        if ii:
+            ab, j = ii.pop()
+            heap.append((ab, i, j))
+    heapq.heapify(heap)
+    while heap:
+        ab, i, j = heapq.heappop(heap)
+        yield -ab, points[i], points[j]
+        if not pending[i]:
+            pending[i] = partners(i, (ab, j))
+        if pending[i]:
+            ab, j = pending[i].pop()
+            heapq.heappush(heap, (ab, i, j))
 
 
 def sig(n: int) -> int:
@@ -147,12 +225,104 @@ def go(p: Point, v: Point) -> Point:
     return p[0] + v[0], p[1] + v[1]
 
 
-def outside(
-    a: Point, b: Point, facing: dict[Point, Point]
-) -> bool:
-    box = rect(a, b)
-    for p in box:
+def compress(values: Iterable[int]) -> dict[int, int]:
+    '''
+    cell of every coordinate, leaving one cell for each gap of tiles
+    between neighbouring coordinates, and one for the border before
 
+    >>> compress([7, 2, 3, 11])
+    {2: 1, 3: 2, 7: 4, 11: 6}
+    '''
+    result: dict[int, int] = {}
+    for v in sorted(set(values)):
+        if not result:
+            result[v] = 1
+        else:
+            result[v] = i + (1 if v - last == 1 else 2)
+        i, last = result[v], v
+    return result
+
+
+class Floor:
+    '''
+    the polygon rasterized onto its compressed coordinates, with every
+    coordinate and every run of tiles between two coordinates getting a cell
+
+    >>> f = Floor(load(X))
+    >>> f.inside((9, 5), (2, 3))
+    True
+    >>> f.inside((2, 5), (9, 7))
+    False
+    '''
+    def __init__(self, posts: list[Point]):
+        self.xx, self.yy = [compress(vv) for vv in zip(*posts)]
+        w, h = max(self.xx.values()) + 2, max(self.yy.values()) + 2
+        wall = [[False] * w for _ in range(h)]
+        for a, b in pairwise(posts + posts[:1]):
+            (x1, y1), (x2, y2) = self.cell(a), self.cell(b)
+            for y in range(min(y1, y2), max(y1, y2) + 1):
+                for x in range(min(x1, x2), max(x1, x2) + 1):
+                    wall[y][x] = True
+        outside = [[0] * w for _ in range(h)]
+        outside[0][0] = 1
+        queue = deque([(0, 0)])
+        while queue:
+            x, y = queue.popleft()
+            for nx, ny in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+                if 0 <= nx < w and 0 <= ny < h and not (
+                    wall[ny][nx] or outside[ny][nx]
+                ):
+                    outside[ny][nx] = 1
+                    queue.append((nx, ny))
+        self.sums = [[0] * (w + 1)]
+        for row in outside:
+            above = self.sums[-1]
+            self.sums.append([
+                s + t for s, t in zip(above, accumulate(row, initial=0))
+            ])
+
+    def cell(self, p: Point) -> Point:
+        return self.xx[p[0]], self.yy[p[1]]
+
+    def inside(self, a: Point, b: Point) -> bool:
+        (x1, y1), (x2, y2) = self.cell(a), self.cell(b)
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        ss = self.sums
+        return not (
+            ss[y2+1][x2+1] - ss[y1][x2+1] - ss[y2+1][x1] + ss[y1][x1]
+        )
+
+
+def test_floor_notch() -> None:
+    u = [(0, 0), (10, 0), (10, 10), (7, 10), (7, 3), (3, 3), (3, 10), (0, 10)]
+    f = Floor(u)
+    assert f.inside((0, 0), (7, 3))
+    assert f.inside((10, 10), (7, 3))
+    assert not f.inside((0, 10), (10, 0))
+    assert not f.inside((3, 10), (7, 10))
+    assert bigrect_inside(u) == (44, (0, 0), (3, 10))
+
+
+def test_floor_slit() -> None:
+    u = [(0, 0), (10, 0), (10, 10), (6, 10), (6, 3), (5, 3), (5, 10), (0, 10)]
+    assert Floor(u).inside((0, 0), (10, 10))
+    assert bigrect_inside(u)[0] == 121
+
+
+def test_descending() -> None:
+    for points in (
+        [(3, 3)],
+        [(0, 0), (5, 0), (2, 0)],
+        [(1, 1), (9, 9), (0, 10), (10, 0), (1, 1)],
+        [(x, y) for x in range(3) for y in range(3)],
+        load(X),
+    ):
+        for chunk in (1, 2, 16):
+            assert list(descending(points, chunk=chunk)) == sorted(
+                ((area(a, b), a, b) for a, b in combinations(points, 2)),
+                key=lambda t: -t[0],
+            )
 
 
 def bigrect_inside(points: list[Point]) -> tuple[int, Point, Point]:
@@ -160,16 +330,14 @@ def bigrect_inside(points: list[Point]) -> tuple[int, Point, Point]:
     >>> bigrect_inside(load(X))
     (24, (9, 5), (2, 3))
     '''
-    pairs = sorted(
-        combinations(points, 2), key=lambda p: area(*p),
-        reverse=True,
+    f = Floor(points)
+    return next(
+        (ab, a, b) for ab, a, b in descending(points) if f.inside(a, b)
     )
-    f = fence(points)
-    pairs = dropwhile(lambda pair: outside(*pair, f), pairs)
-    a, b = pairs[0]
-    return area(a, b), a, b
 
 
 if __name__ == '__main__':
     a, p, q = bigrect(load(Path('input.txt').read_text()))
     print(f'{a}m² between {p} ⊞ {q}')
+    a, p, q = bigrect_inside(load(Path('input.txt').read_text()))
+    print(f'{a}m² between {p} ⊞ {q}')
@@ -1,6 +1,10 @@
-from collections import defaultdict
+from __future__ import annotations
+from array import array
+from collections import defaultdict, deque
 import itertools
+import math
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 
 X = '''\
@@ -26,19 +30,176 @@ def load(src: str) -> dict[str, list[str]]:
     >>> g['you']
     ['bbb', 'ccc']
     '''
-    edges = {}
-    for line in src.split('\n'):
+    return dict(parse(src.split('\n')))
+
+
+def parse(lines: Iterable[str]) -> Iterator[tuple[str, list[str]]]:
+    for line in lines:
         if not line.strip():
             continue
         node, outputs = line.split(':')
-        edges[node] = list(
+        yield node, list(
             map(str.strip, outputs.split())
         )
-    return edges
+
+
+def csr(
+    n: int, sources: array, targets: array,
+) -> tuple[array, array]:
+    '''
+    >>> offsets, adjs = csr(3, array('l', [2, 0, 2]), array('l', [0, 1, 1]))
+    >>> offsets.tolist(), adjs.tolist()
+    ([0, 1, 1, 3], [1, 0, 1])
+    '''
+    offsets = array('l', [0]) * (n + 1)
+    for i in sources:
+        offsets[i+1] += 1
+    for i in range(n):
+        offsets[i+1] += offsets[i]
+    fill = offsets[:-1]
+    result = array('l', [0]) * len(targets)
+    for i, j in zip(sources, targets):
+        result[fill[i]] = j
+        fill[i] += 1
+    return offsets, result
+
+
+class Graph:
+    '''
+    node names interned to dense integers, edges kept in CSR arrays for
+    both directions; reads like the dict returned by load
+
+    >>> g = Graph(parse(X.split('\\n')))
+    >>> len(g), g['you'], g.get('out')
+    (10, ['bbb', 'ccc'], None)
+    >>> g.names[g.adjacent(g.ids['hhh'])[-1]]
+    'iii'
+    '''
+    def __init__(self, edges: Iterable[tuple[str, list[str]]]):
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.keys = array('l')
+        sources, targets = array('l'), array('l')
+        for node, adjs in edges:
+            self.keys.append(i := self.intern(node))
+            for adj in adjs:
+                sources.append(i)
+                targets.append(self.intern(adj))
+        n = len(self.names)
+        self.offsets, self.targets = csr(n, sources, targets)
+        self.roffsets, self.rtargets = csr(n, targets, sources)
+        self.rkeys = array('l', dict.fromkeys(targets))
+        self.declared = bytearray(n)
+        for i in self.keys:
+            self.declared[i] = 1
+
+    def intern(self, name: str) -> int:
+        if (i := self.ids.get(name)) is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def adjacent(self, i: int) -> array:
+        return self.targets[self.offsets[i]:self.offsets[i+1]]
+
+    def reversed(self) -> Graph:
+        result: Graph = self.__class__.__new__(self.__class__)
+        result.names, result.ids = self.names, self.ids
+        result.keys, result.rkeys = self.rkeys, self.keys
+        result.offsets, result.roffsets = self.roffsets, self.offsets
+        result.targets, result.rtargets = self.rtargets, self.targets
+        result.declared = bytearray(
+            a < b for a, b in itertools.pairwise(result.offsets)
+        )
+        return result
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, name: str) -> bool:
+        i = self.ids.get(name)
+        return i is not None and bool(self.declared[i])
+
+    def __getitem__(self, name: str) -> list[str]:
+        if name not in self:
+            raise KeyError(name)
+        return [self.names[j] for j in self.adjacent(self.ids[name])]
+
+    def get(
+        self, name: str, default: list[str] | None = None,
+    ) -> list[str] | None:
+        return self[name] if name in self else default
+
+    def items(self) -> Iterator[tuple[str, list[str]]]:
+        for i in self.keys:
+            yield self.names[i], [self.names[j] for j in self.adjacent(i)]
+
+    def reach(self, start: int) -> list[int]:
+        seen = bytearray(len(self.names))
+        seen[start] = 1
+        result = [start]
+        stack = [start]
+        while stack:
+            for j in self.adjacent(stack.pop()):
+                if not seen[j]:
+                    seen[j] = 1
+                    result.append(j)
+                    stack.append(j)
+        return result
+
+    def toposort(self, start: int) -> list[int]:
+        nodes = self.reach(start)
+        indegree = array('l', [0]) * len(self.names)
+        for i in nodes:
+            for j in self.adjacent(i):
+                indegree[j] += 1
+        queue = deque(i for i in nodes if not indegree[i])
+        result = []
+        while queue:
+            result.append(i := queue.popleft())
+            for j in self.adjacent(i):
+                indegree[j] -= 1
+                if not indegree[j]:
+                    queue.append(j)
+        if len(result) < len(nodes):
+            raise ValueError(f'cycle reachable from {self.names[start]}')
+        return result
+
+    def ways(self, start: int) -> list[int]:
+        '''
+        >>> g = Graph(parse(['a: b c', 'b: c']))
+        >>> g.ways(g.ids['a'])
+        [1, 1, 2]
+        '''
+        result = [0] * len(self.names)
+        result[start] = 1
+        for i in self.toposort(start):
+            if n := result[i]:
+                for j in self.adjacent(i):
+                    result[j] += n
+        return result
+
+    def find(self, start: int, end: int) -> list[list[int]]:
+        dead = bytearray(len(self.names))
+
+        def recurse(i: int) -> list[list[int]]:
+            if i == end:
+                return [[i]]
+            if dead[i]:
+                return []
+            result = [
+                [i] + tail
+                for j in self.adjacent(i)
+                for tail in recurse(j)
+            ]
+            if not result:
+                dead[i] = 1
+            return result
+        return recurse(start)
 
 
 def find(
-    edges: dict[str, list[str]],
+    edges: dict[str, list[str]] | Graph,
     *checkpoints: str,
     start: str = 'you', end: str = 'out',
 ) -> list[list[str]]:
@@ -49,17 +210,28 @@ def find(
     >>> pp[0]
     ['you', 'bbb', 'ddd', 'ggg', 'out']
     '''
+    if isinstance(edges, Graph) and {start, end} <= edges.ids.keys():
+        return [
+            path for path in (
+                [edges.names[i] for i in path]
+                for path in edges.find(edges.ids[start], edges.ids[end])
+            )
+            if all(checkpoint in path for checkpoint in checkpoints)
+        ]
+    dead: set[str] = set()
+
     def recurse(node: str) -> list[list[str]]:
         if node == end:
             return [[node]]
+        if node in dead:
+            return []
         result = [
             [node] + tail
             for adj in edges.get(node, [])
             for tail in recurse(adj)
         ]
         if not result:
-            if node in edges:
-                edges.pop(node, [])
+            dead.add(node)
         return result
     result = [
         path for path in recurse(start)
@@ -123,7 +295,241 @@ def test_pathfinding_with_checkpoints() -> None:
     assert ','.join(pp[1]) == 'svr,aaa,fft,ccc,eee,dac,fff,hhh,out'
 
 
-def todot(edges: dict[str, list[str]]) -> str:
+def test_graph() -> None:
+    for src in (X, Y):
+        gg, dd = Graph(parse(src.split('\n'))), load(src)
+        assert dict(gg.items()) == dd
+        assert dict(reverse(gg).items()) == reverse(dd)
+        assert todot(gg) == todot(dd)
+        assert find(gg, start='aaa') == find(dd, start='aaa')
+        assert find(reverse(gg), start='out', end='you') == find(
+            reverse(dd), start='out', end='you'
+        )
+        assert find(gg, 'fft', start='svr') == find(dd, 'fft', start='svr')
+        for node in ('you', 'svr'):
+            assert reachable(gg, node) == reachable(dd, node)
+            assert toposort(gg, node) == toposort(dd, node)
+            assert ways(gg, node) == ways(dd, node)
+            assert count(gg, 'fft', 'dac', start=node) == count(
+                dd, 'fft', 'dac', start=node
+            )
+
+
+def reachable(
+    edges: dict[str, list[str]] | Graph, start: str,
+) -> set[str]:
+    '''
+    >>> sorted(reachable(load('a: b c\\nb: d\\ne: a'), 'b'))
+    ['b', 'd']
+    '''
+    if isinstance(edges, Graph) and start in edges.ids:
+        return {edges.names[i] for i in edges.reach(edges.ids[start])}
+    seen = {start}
+    stack = [start]
+    while stack:
+        for adj in edges.get(stack.pop(), []):
+            if adj not in seen:
+                seen.add(adj)
+                stack.append(adj)
+    return seen
+
+
+def toposort(
+    edges: dict[str, list[str]] | Graph, start: str,
+) -> list[str]:
+    '''
+    >>> toposort(load('a: b c\\nb: c'), 'a')
+    ['a', 'b', 'c']
+    '''
+    if isinstance(edges, Graph) and start in edges.ids:
+        return [edges.names[i] for i in edges.toposort(edges.ids[start])]
+    seen = reachable(edges, start)
+    indegree = dict.fromkeys(seen, 0)
+    for node in seen:
+        for adj in edges.get(node, []):
+            indegree[adj] += 1
+    queue = deque(node for node in seen if not indegree[node])
+    result = []
+    while queue:
+        result.append(node := queue.popleft())
+        for adj in edges.get(node, []):
+            indegree[adj] -= 1
+            if not indegree[adj]:
+                queue.append(adj)
+    if len(result) < len(seen):
+        raise ValueError(f'cycle reachable from {start}')
+    return result
+
+
+def ways(
+    edges: dict[str, list[str]] | Graph, start: str,
+) -> dict[str, int]:
+    '''
+    >>> ways(load('a: b c\\nb: c'), 'a')
+    {'a': 1, 'b': 1, 'c': 2}
+    '''
+    if isinstance(edges, Graph) and start in edges.ids:
+        return {
+            edges.names[i]: n
+            for i, n in enumerate(edges.ways(edges.ids[start])) if n
+        }
+    result: dict[str, int] = defaultdict(int, {start: 1})
+    for node in toposort(edges, start):
+        for adj in edges.get(node, []):
+            result[adj] += result[node]
+    return dict(result)
+
+
+def between(
+    edges: dict[str, list[str]] | Graph, *sources: str,
+) -> Callable[[str, str], int]:
+    '''
+    count paths from one of the sources to any node
+
+    >>> f = between(Graph(parse(Y.split('\\n'))), 'svr', 'fft')
+    >>> f('svr', 'fft'), f('fft', 'out'), f('fft', 'svr'), f('svr', 'zzz')
+    (1, 4, 0, 0)
+    '''
+    if isinstance(edges, Graph) and set(sources) <= edges.ids.keys():
+        ids = edges.ids
+        counts = {node: edges.ways(ids[node]) for node in sources}
+        return lambda a, b: counts[a][ids[b]] if b in ids else 0
+    tables = {node: ways(edges, node) for node in sources}
+    return lambda a, b: tables[a].get(b, 0)
+
+
+def count(
+    edges: dict[str, list[str]] | Graph,
+    *checkpoints: str,
+    start: str = 'you', end: str = 'out',
+) -> int:
+    '''
+    >>> count(load(X))
+    5
+    >>> count(load(Y), start='svr')
+    8
+    >>> count(load(Y), 'fft', 'dac', start='svr')
+    2
+    >>> count(load(Y), 'hub', 'dac', start='svr')
+    0
+    >>> count(load(Y), 'fft', 'fft', 'out', start='svr')
+    4
+    '''
+    checkpoints = tuple(
+        c for c in dict.fromkeys(checkpoints) if c not in (start, end)
+    )
+    segment = between(edges, start, *checkpoints)
+    return sum(
+        math.prod(
+            segment(a, b)
+            for a, b in itertools.pairwise((start, *order, end))
+        )
+        for order in itertools.permutations(checkpoints)
+    )
+
+
+def walk(
+    edges: dict[str, list[str]] | Graph,
+    *stops: str,
+    alive: list[set[str]] | None = None,
+) -> Iterator[list[str]]:
+    '''
+    paths passing the stops in order, in one depth-first search that only
+    enters nodes from which the next stop can still be reached
+
+    >>> next(walk(load(X), 'you', 'out'))
+    ['you', 'bbb', 'ddd', 'ggg', 'out']
+    >>> len(list(walk(load(Y), 'svr', 'dac', 'fft', 'out')))
+    0
+    '''
+    if alive is None:
+        back = reverse(edges)
+        alive = [reachable(back, stop) for stop in stops[1:]]
+    if stops[0] not in alive[0]:
+        return
+    path, legs = [stops[0]], [0]
+    stack = [iter(edges.get(stops[0], []))]
+    while stack:
+        leg = legs[-1]
+        adj = next((adj for adj in stack[-1] if adj in alive[leg]), None)
+        if adj is None:
+            path.pop()
+            legs.pop()
+            stack.pop()
+            continue
+        path.append(adj)
+        leg += adj == stops[leg+1]
+        if leg == len(stops) - 1:
+            yield list(path)
+            path.pop()
+            continue
+        legs.append(leg)
+        stack.append(iter(edges.get(adj, [])))
+
+
+def paths(
+    edges: dict[str, list[str]] | Graph,
+    *checkpoints: str,
+    start: str = 'you', end: str = 'out',
+) -> Iterator[list[str]]:
+    '''
+    >>> pp = paths(load(Y), 'fft', 'dac', start='svr')
+    >>> ','.join(next(pp))
+    'svr,aaa,fft,ccc,eee,dac,fff,ggg,out'
+    '''
+    checkpoints = tuple(
+        c for c in dict.fromkeys(checkpoints) if c not in (start, end)
+    )
+    segment = between(edges, start, *checkpoints)
+    back = reverse(edges)
+    alive: dict[str, set[str]] = {}
+    for order in itertools.permutations(checkpoints):
+        stops = (start, *order, end)
+        if not all(
+            segment(a, b) for a, b in itertools.pairwise(stops)
+        ):
+            continue
+        for stop in stops[1:]:
+            if stop not in alive:
+                alive[stop] = reachable(back, stop)
+        yield from walk(
+            edges, *stops, alive=[alive[stop] for stop in stops[1:]]
+        )
+
+
+def test_lazy_paths() -> None:
+    gg = load(Y)
+    assert list(paths(gg, start='svr')) == find(load(Y), start='svr')
+    assert list(paths(gg, 'dac', 'fft', start='svr')) == find(
+        load(Y), 'fft', 'dac', start='svr'
+    )
+    assert list(paths(gg, 'svr', 'out', start='svr')) == find(
+        load(Y), start='svr'
+    )
+    assert list(paths(gg, 'fft', 'fft', start='svr')) == find(
+        load(Y), 'fft', start='svr'
+    )
+    assert count(gg, 'fft', 'fft', start='svr') == len(
+        find(load(Y), 'fft', start='svr')
+    ) == 4
+    diamonds = {'svr': ['a0', 'b0']} | {
+        f'{n}{i}': [f'm{i}'] for i in range(30) for n in 'ab'
+    } | {
+        f'm{i}': [f'a{i+1}', f'b{i+1}'] for i in range(29)
+    } | {'m29': ['fft'], 'fft': ['dac'], 'dac': ['out']}
+    assert next(paths(diamonds, 'dac', 'fft', start='svr'))[-3:] == [
+        'fft', 'dac', 'out'
+    ]
+
+
+def test_counting_deep() -> None:
+    n = 5000
+    edges = {f'n{i}': [f'n{i+1}', f'm{i}'] for i in range(n)}
+    edges |= {f'm{i}': [f'n{i+1}'] for i in range(n)}
+    assert count(edges, start='n0', end=f'n{n}') == 2 ** n
+
+
+def todot(edges: dict[str, list[str]] | Graph) -> str:
     '''
     >>> print(todot(load('svr: aaa bbb\\naaa: fft')))
     digraph G {
@@ -140,12 +546,16 @@ def todot(edges: dict[str, list[str]]) -> str:
     return '\n'.join(['digraph G {'] + lines + ['}'])
 
 
-def reverse(edges: dict[str, list[str]]) -> dict[str, list[str]]:
+def reverse(
+    edges: dict[str, list[str]] | Graph,
+) -> dict[str, list[str]] | Graph:
     '''
     >>> gg = load('a: b c\\nb: d e\\nc: e')
     >>> reverse(gg)
     {'b': ['a'], 'c': ['a'], 'd': ['b'], 'e': ['b', 'c']}
     '''
+    if isinstance(edges, Graph):
+        return edges.reversed()
     result = defaultdict(list)
     for node, adjs in edges.items():
         for adj in adjs:
@@ -192,7 +602,7 @@ if __name__ == '__main__':
     # paths = find(reverse(edges), start='fft', end='svr')  # viable
     # paths = find(edges, start='dac', end='out')  # viable
     # paths = find(edges, start='fft', end='dac')
-    paths = part2(edges, 'fft', 'dac')
-    print('\n'.join(' -> '.join(path) for path in paths))
+    print(count(edges))
+    print(count(edges, 'fft', 'dac', start='svr'))
     # print(len(paths))
     # print(todot(reverse(edges)))
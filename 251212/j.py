@@ -1,8 +1,14 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, partial
+from pathlib import Path
 import re
 from typing import Iterable
 
 
+type Region = tuple[int, int, tuple[int, ...]]
+
+
 X = '''
 0:
 ###
@@ -67,10 +73,82 @@ def load(src: str) -> dict[int, Shape]:
     return shapes
 
 
+TURN = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+FLIP = (6, 7, 8, 3, 4, 5, 0, 1, 2)
+
+
+def permute(mask: int, table: tuple[int, ...]) -> int:
+    '''
+    >>> bin(permute(0b000_000_111, TURN))
+    '0b100100100'
+    '''
+    return sum(1 << i for i, j in enumerate(table) if mask >> j & 1)
+
+
+def spread(mask: int, width: int) -> int:
+    '''
+    lay out the 3x3 bits of a shape in rows of the given width
+
+    >>> bin(spread(0b111_000_001, 4))
+    '0b11100000001'
+    '''
+    return sum((mask >> 3 * y & 7) << y * width for y in range(3))
+
+
+def regions(src: str) -> list[Region]:
+    '''
+    >>> regions(X)[1]
+    (12, 5, (1, 0, 1, 0, 2, 2))
+    '''
+    return [
+        (int(w), int(h), tuple(map(int, counts.split())))
+        for w, h, counts in re.findall(r'^(\d+)x(\d+):(.*)$', src, re.M)
+    ]
+
+
 class Shape:
     def __init__(self, grid: Iterable[str]):
         self.data = ''.join(grid)
 
+    @classmethod
+    def frommask(cls, mask: int) -> Shape:
+        '''
+        >>> Shape.frommask(0b111_001_011)
+        ##.
+        #..
+        ###
+        '''
+        return cls(['#' if mask >> i & 1 else '.' for i in range(9)])
+
+    @cached_property
+    def mask(self) -> int:
+        '''
+        >>> bin(Shape(['##.', '#..', '###']).mask)
+        '0b111001011'
+        '''
+        return sum(1 << i for i, c in enumerate(self.data) if c == '#')
+
+    @cached_property
+    def orientations(self) -> tuple[int, ...]:
+        '''
+        the distinct masks of all turned and flipped versions of the shape
+
+        >>> len(Shape(['###', '.#.', '###']).orientations)
+        2
+        >>> len(Shape(['###', '#..', '##.']).orientations)
+        8
+        >>> Shape.frommask(Shape(['###', '#..', '##.']).orientations[1])
+        ###
+        #.#
+        ..#
+        '''
+        result: dict[int, None] = {}
+        for mask in (self.mask, permute(self.mask, FLIP)):
+            for _ in range(4):
+                result[mask] = None
+                mask = permute(mask, TURN)
+        return tuple(result)
+
     def hflip(self) -> Shape:
         '''
         >>> Shape(['###', '#..', '##.']).hflip()
@@ -105,14 +183,10 @@ class Shape:
         #.#
         ###
         '''
-        if turns == 0:
-            return self
-        return Shape(
-            ''.join(
-                self.data[o+i] for o in range(6, -3, -3)
-            )
-            for i in range(3)
-        ).turn(turns - 1)
+        data = self.data
+        for _ in range(turns % 4):
+            data = ''.join(data[j] for j in TURN)
+        return Shape([data])
 
     def __repr__(self) -> str:
         '''
@@ -124,3 +198,149 @@ class Shape:
         return '\n'.join(
             self.data[i:i+3] for i in range(0, 9, 3)
         )
+
+
+def placements(
+    shape: Shape, width: int, height: int,
+) -> list[int]:
+    '''
+    every way to put the shape into a width x height board, as bitboards
+
+    >>> len(placements(Shape(['###', '.#.', '###']), 4, 3))
+    4
+    '''
+    result = []
+    for mask in shape.orientations:
+        cells = [i for i in range(9) if mask >> i & 1]
+        xs, ys = [i % 3 for i in cells], [i // 3 for i in cells]
+        bits = spread(mask, width)
+        for y in range(-min(ys), height - max(ys)):
+            for x in range(-min(xs), width - max(xs)):
+                shift = y * width + x
+                result.append(bits << shift if shift >= 0 else bits >> -shift)
+    return result
+
+
+def fits(shapes: dict[int, Shape], region: Region) -> bool:
+    '''
+    >>> ss = load(X)
+    >>> [fits(ss, r) for r in regions(X)]
+    [True, True, False]
+    '''
+    width, height, counts = region
+    need = {i: n for i, n in enumerate(counts) if n}
+    slack = width * height - sum(
+        n * shapes[i].mask.bit_count() for i, n in need.items()
+    )
+    if slack < 0:
+        return False
+    if (width // 3) * (height // 3) >= sum(need.values()):
+        return True
+    # whatever way a shape is put down, it covers at least this many cells
+    # of either colour of a checkerboard
+    if sum(
+        n * min(b := (shapes[i].mask & 0b101010101).bit_count(),
+                shapes[i].mask.bit_count() - b)
+        for i, n in need.items()
+    ) > width * height // 2:
+        return False
+    # fill along the short side, so fewer partial rows need remembering
+    width, height = sorted((width, height))
+    return pack([
+        (n, placements(shapes[i], width, height)) for i, n in need.items()
+    ], width, width * height, slack)
+
+
+def pack(
+    pieces: list[tuple[int, list[int]]], width: int, size: int, slack: int,
+) -> bool:
+    '''
+    fill the board from its first free cell on, either with a placement
+    whose lowest cell it is, or by leaving the cell empty while there are
+    cells to spare; free cells in the next width cells that no placement
+    left can reach are given up at once, and states below which nothing
+    fits are remembered, up to a limit
+
+    >>> ring = Shape(['###', '#.#', '###'])
+    >>> pack([(2, placements(ring, 5, 3))], 5, 15, 0)
+    False
+    >>> pack([(2, placements(ring, 6, 3))], 6, 18, 2)
+    True
+    '''
+    remaining = [n for n, _ in pieces]
+    anchors: list[list[tuple[int, int]]] = [[] for _ in range(size)]
+    for k, (_, bits) in enumerate(pieces):
+        for b in bits:
+            anchors[(b & -b).bit_length() - 1].append((k, b))
+    for options in anchors:
+        options.sort(key=lambda option: option[1])
+    row, full = (1 << width) - 1, (1 << size) - 1
+
+    dead: set[tuple[int, int, int, tuple[int, ...]]] = set()
+
+    def search(board: int, slack: int) -> bool:
+        seen = []
+        while any(remaining):
+            cell = (~board & (board + 1)).bit_length() - 1
+            state = (cell, board >> cell, slack, tuple(remaining))
+            if cell >= size or state in dead:
+                break
+            seen.append(state)
+            reach = 0
+            for a in range(cell, min(cell + width, size)):
+                if not board >> a & 1:
+                    for k, bits in anchors[a]:
+                        if remaining[k] and not board & bits:
+                            reach |= bits
+            lost = ~(board | reach) & row << cell & full
+            if lost:
+                if lost.bit_count() > slack:
+                    break
+                board |= lost
+                slack -= lost.bit_count()
+                continue
+            for k, bits in anchors[cell]:
+                if remaining[k] and not board & bits:
+                    remaining[k] -= 1
+                    found = search(board | bits, slack)
+                    remaining[k] += 1
+                    if found:
+                        return True
+            if not slack:
+                break
+            board |= 1 << cell
+            slack -= 1
+        else:
+            return True
+        if len(dead) > 1 << 20:
+            dead.clear()
+        dead.update(seen)
+        return False
+
+    return search(0, slack)
+
+
+def count_fitting(
+    shapes: dict[int, Shape], rr: list[Region], workers: int = 1,
+) -> int:
+    '''
+    >>> count_fitting(load(X), regions(X), workers=2)
+    2
+    '''
+    f = partial(fits, shapes)
+    if workers < 2:
+        return sum(map(f, rr))
+    with ProcessPoolExecutor(workers) as pool:
+        return sum(pool.map(f, rr, chunksize=max(1, len(rr) // workers)))
+
+
+def test_orientations() -> None:
+    for shape in load(X).values():
+        assert set(shape.orientations) == {
+            s.turn(k).mask for s in (shape, shape.vflip()) for k in range(4)
+        }
+
+
+if __name__ == '__main__':
+    src = Path('input.txt').read_text()
+    print(count_fitting(load(src), regions(src), workers=8))